@@ -1,15 +1,51 @@
-import json
 import os
+import random
 import re
+import subprocess
 import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
 
-import ffmpeg
+import orjson
+from requests import RequestException
 
 from utils.custom_exceptions import AccountPrivate, CountryBlacklisted, \
     LiveNotFound, UserNotLiveException, IPBlockedByWAF, LiveRestriction
 from utils.enums import Mode, Error, StatusCode, TimeOut
-from http_utils.http_client import HttpClient
+
+_RE_LIVE_USER = re.compile(r"com/@(.*?)/live")
+_RE_TIKTOK_LIVE_URL = re.compile(r"https?://(?:www\.)?tiktok\.com/@([^/]+)/live")
+_RE_SIGI = re.compile(
+    r'<script id="SIGI_STATE" type="application/json">(.*?)</script>',
+    re.DOTALL)
+
+_SIGI_OPEN_TAG = '<script id="SIGI_STATE" type="application/json">'
+_SIGI_CLOSE_TAG = '</script>'
+
+# Stream copy buffer: 256 KiB per read keeps the Python-level iteration
+# count low on multi-MB/s FLV streams.
+_STREAM_CHUNK_SIZE = 262144
+
+# posix_fadvise is Linux-only; on other platforms the capture file simply
+# stays in page cache.
+_HAS_FADVISE = hasattr(os, "posix_fadvise")
+
+# Automatic-mode backoff: start at one minute after a "not live" signal and
+# double up to the old fixed poll interval, resetting once a recording
+# starts.
+_BACKOFF_BASE = int(TimeOut.ONE_MINUTE)
+_BACKOFF_CAP = TimeOut.AUTOMATIC_MODE * TimeOut.ONE_MINUTE
+
+
+def _remux_worker(src: str, dst: str) -> None:
+    """
+    Remux an FLV capture to MP4 in a worker process and delete the source.
+    """
+    subprocess.run(
+        ["ffmpeg", "-y", "-loglevel", "error", "-i", src, "-c", "copy", dst],
+        check=True
+    )
+    os.remove(src)
 
 
 class TikTok:
@@ -37,6 +73,25 @@ class TikTok:
         self.output = output
         self.logger = logger
 
+        # Normalize the output directory once; recordings only need to
+        # prepend it to the file name.
+        if self.output and isinstance(self.output, str):
+            self._out_dir = os.path.normpath(self.output) + os.sep
+        else:
+            self._out_dir = ''
+
+        # Background MP4 remux pool: conversions overlap with the next
+        # recording instead of blocking the automatic-mode loop.
+        self._conv_pool = ProcessPoolExecutor(
+            max_workers=max(1, (os.cpu_count() or 2) // 2)
+        )
+        self._conv_futures = []
+
+        # Single-slot cache of the /@user/live page, shared between the
+        # country-blacklist check and the room_id extraction so the
+        # construction path issues one request instead of two.
+        self._live_page_cache = None
+
         # Check if the user's country is blacklisted
         is_blacklisted = self.is_country_blacklisted()
         if is_blacklisted:
@@ -61,11 +116,6 @@ class TikTok:
         else:
             self.logger.info(f"ROOM_ID:  {self.room_id}")
 
-        # Create a new httpclient without proxy
-        self.httpclient = HttpClient(
-            self.logger, cookies=self.cookies, proxy=None
-        ).req
-
     def run(self):
         """
         runs the program in the selected mode. 
@@ -75,6 +125,13 @@ class TikTok:
         If the mode is AUTOMATIC, it continuously checks if the user is live and if not, waits for the specified timeout before rechecking.
         If the user is live, it starts recording.
         """
+        try:
+            self._run()
+        finally:
+            # Let pending background conversions finish before exiting.
+            self._conv_pool.shutdown(wait=True)
+
+    def _run(self):
         if self.mode == Mode.MANUAL:
 
             if self.room_id == "":
@@ -86,6 +143,7 @@ class TikTok:
             self.start_recording()
 
         if self.mode == Mode.AUTOMATIC:
+            backoff = _BACKOFF_BASE
             while True:
 
                 try:
@@ -98,30 +156,61 @@ class TikTok:
                         raise UserNotLiveException(Error.USER_NOT_CURRENTLY_LIVE)
 
                     self.start_recording()
+                    backoff = _BACKOFF_BASE
 
-                except UserNotLiveException as ex:
+                # LiveNotFound covers the race where check_alive reports
+                # alive but the stream URL is already gone: the live ended
+                # between the two calls, so back off and repoll like any
+                # other not-live signal.
+                except (UserNotLiveException, LiveNotFound) as ex:
                     self.logger.info(ex)
-                    self.logger.info(f"waiting {TimeOut.AUTOMATIC_MODE} minutes before recheck\n")
-                    time.sleep(TimeOut.AUTOMATIC_MODE * TimeOut.ONE_MINUTE)
+                    backoff = self._sleep_with_backoff(backoff)
 
                 except ConnectionAbortedError:
                     self.logger.error(Error.CONNECTION_CLOSED_AUTOMATIC)
-                    time.sleep(TimeOut.CONNECTION_CLOSED * TimeOut.ONE_MINUTE)
+                    backoff = self._sleep_with_backoff(backoff)
 
-                except Exception as ex:
-                    self.logger.error(ex)
+                except (RequestException, ValueError, IPBlockedByWAF) as ex:
+                    # ValueError also covers JSON decode failures and
+                    # roomId-extraction errors. Anything else is a bug and
+                    # propagates; a minimum sleep keeps persistent network
+                    # failures from spinning the loop.
+                    self.logger.error(str(ex))
+                    time.sleep(TimeOut.MIN_RETRY)
+
+    def _sleep_with_backoff(self, backoff: int) -> int:
+        """
+        Sleep for the current backoff plus jitter and return the next
+        (doubled, capped) backoff value.
+        """
+        delay = min(_BACKOFF_CAP, backoff)
+        delay += random.uniform(0, delay * 0.1)
+        self.logger.info(f"waiting {delay:.0f} seconds before recheck\n")
+        time.sleep(delay)
+        return min(_BACKOFF_CAP, backoff * 2)
 
     def convertion_mp4(self, file):
         """
-        Convert the video from flv format to mp4 format
+        Convert the video from flv format to mp4 format in a background
+        process, so a new recording can start immediately.
         """
-        try:
-            self.logger.info("Converting {} to MP4 format...".format(file))
-            ffmpeg.input(file).output(file.replace('_flv.mp4', '.mp4'), y='-y').run(quiet=True)
-            os.remove(file)
+        self.logger.info("Converting {} to MP4 format in background...".format(file))
+        future = self._conv_pool.submit(
+            _remux_worker, file, file.replace('_flv.mp4', '.mp4')
+        )
+        future.add_done_callback(
+            lambda f, file=file: self._log_convertion_result(f, file)
+        )
+        self._conv_futures.append(future)
+
+    def _log_convertion_result(self, future, file):
+        ex = future.exception()
+        if ex is None:
             self.logger.info("Finished converting {}".format(file))
-        except FileNotFoundError:
-            self.logger.error("FFmpeg is not installed. -> pip install ffmpeg-python")
+        elif isinstance(ex, FileNotFoundError):
+            self.logger.error("FFmpeg is not installed.")
+        else:
+            self.logger.error("Error converting {}: {}".format(file, ex))
 
     def start_recording(self):
         """
@@ -133,15 +222,7 @@ class TikTok:
 
         current_date = time.strftime("%Y.%m.%d_%H-%M-%S", time.localtime())
 
-        # TO CHANGE
-        if (self.output != "" and isinstance(self.output, str) and not
-        (self.output.endswith('/') or self.output.endswith('\\'))):
-            if os.name == 'nt':
-                self.output = self.output + "\\"
-            else:
-                self.output = self.output + "/"
-
-        output = f"{self.output if self.output else ''}TK_{self.user}_{current_date}_flv.mp4"
+        output = f"{self._out_dir}TK_{self.user}_{current_date}_flv.mp4"
 
         print("")
         if self.duration:
@@ -152,31 +233,49 @@ class TikTok:
         try:
             if self.use_ffmpeg:
                 self.logger.info("[PRESS 'q' TO STOP RECORDING]")
-                stream = ffmpeg.input(live_url)
-
+                cmd = ["ffmpeg", "-loglevel", "error", "-i", live_url]
                 if self.duration is not None:
-                    stream = ffmpeg.output(stream, output.replace("_flv.mp4", ".mp4"), c='copy', t=self.duration)
-                else:
-                    stream = ffmpeg.output(stream, output.replace("_flv.mp4", ".mp4"), c='copy')
+                    cmd += ["-t", str(self.duration)]
+                cmd += ["-c", "copy", "-y", output.replace("_flv.mp4", ".mp4")]
 
-                ffmpeg.run(stream, quiet=True)
+                subprocess.run(cmd, check=True, stderr=subprocess.PIPE)
             else:
                 self.logger.info("[PRESS ONLY ONCE CTRL + C TO STOP]")
                 response = self.httpclient.get(live_url, stream=True)
-                with open(output, "wb") as out_file:
+                # FLV is already binary: read straight off the urllib3
+                # socket instead of going through requests' decoder.
+                response.raw.decode_content = False
+                # Write through a raw fd and tell the kernel to drop the
+                # written pages: the capture is never re-read, so there is
+                # no point letting a multi-GB stream evict the page cache.
+                fd = os.open(
+                    output, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644
+                )
+                try:
                     start_time = time.time()
-                    for chunk in response.iter_content(chunk_size=4096):
-                        out_file.write(chunk)
-                        elapsed_time = time.time() - start_time
-                        if self.duration is not None and elapsed_time >= self.duration:
+                    written = 0
+                    while True:
+                        chunk = response.raw.read(_STREAM_CHUNK_SIZE)
+                        if not chunk:
                             break
+                        written += os.write(fd, chunk)
+                        if _HAS_FADVISE:
+                            os.posix_fadvise(
+                                fd, 0, written, os.POSIX_FADV_DONTNEED
+                            )
+                        if (self.duration is not None and
+                                time.time() - start_time >= self.duration):
+                            break
+                finally:
+                    os.close(fd)
 
-        except ffmpeg.Error as e:
+        except subprocess.CalledProcessError as e:
             self.logger.error('FFmpeg Error:')
-            self.logger.error(e.stderr.decode('utf-8'))
+            if e.stderr:
+                self.logger.error(e.stderr.decode('utf-8'))
 
         except FileNotFoundError:
-            self.logger.error("FFmpeg is not installed -> pip install ffmpeg-python")
+            self.logger.error("FFmpeg is not installed.")
             sys.exit(1)
 
         except KeyboardInterrupt:
@@ -187,26 +286,33 @@ class TikTok:
         if self.use_ffmpeg:
             return
 
-        if not self.convert:
-            self.logger.info("Do you want to convert it to real mp4? [Requires ffmpeg installed] -> pip install ffmpeg-python")
+        if self.convert:
+            self.convertion_mp4(output)
+            return
+
+        # Prompting is only safe in manual mode: a blocking input() in
+        # automatic mode would stall re-polling indefinitely. Unattended
+        # runs opt in up-front with --auto-convert.
+        if self.mode == Mode.MANUAL:
+            self.logger.info("Do you want to convert it to real mp4? [Requires ffmpeg installed]")
             choice = input("Y/N -> ")
             if choice.lower() == "y":
                 self.convertion_mp4(output)
-        else:
-            self.convertion_mp4(output)
 
     def get_live_url(self) -> str:
         """
         I get the cdn (flv or m3u8) of the streaming
         """
         url = f"https://webcast.tiktok.com/webcast/room/info/?aid=1988&room_id={self.room_id}"
-        data = self.httpclient.get(url).json()
+        data = orjson.loads(self.httpclient.get(url).content)
 
         if 'This account is private' in data:
             raise AccountPrivate
 
-        live_url_flv = data.get(
-            'data', {}).get('stream_url', {}).get('rtmp_pull_url', None)
+        try:
+            live_url_flv = data['data']['stream_url']['rtmp_pull_url']
+        except (KeyError, TypeError):
+            live_url_flv = None
 
         if live_url_flv is None and data.get('status_code') == 4003110:
             raise LiveRestriction
@@ -215,19 +321,32 @@ class TikTok:
 
         return live_url_flv
 
-    def is_user_in_live(self) -> bool:
+    def are_users_in_live(self, room_ids: list) -> dict:
         """
-        Checking whether the user is live.
+        Checking which of the given room_ids are live. The check_alive
+        endpoint accepts comma-separated IDs, so one request covers the
+        whole batch.
         """
-        data = self.httpclient.get(
+        data = orjson.loads(self.httpclient.get(
             "https://webcast.tiktok.com:443/webcast/room/check_alive/"
-            f"?aid=1988&region=CH&room_ids={self.room_id}&user_is_login=true"
-        ).json()
+            f"?aid=1988&region=CH&room_ids={','.join(room_ids)}"
+            "&user_is_login=true"
+        ).content)
+
+        entries = data.get('data') or []
 
-        if 'data' not in data or len(data['data']) == 0:
-            return False
+        return {
+            str(entry.get('room_id')): bool(entry.get('alive', False))
+            for entry in entries
+        }
 
-        return data['data'][0].get('alive', False)
+    def is_user_in_live(self) -> bool:
+        """
+        Checking whether the user is live.
+        """
+        alive = self.are_users_in_live([self.room_id])
+
+        return alive.get(str(self.room_id), False)
 
     def get_room_and_user_from_url(self):
         """
@@ -240,48 +359,74 @@ class TikTok:
             raise CountryBlacklisted('Redirect')
 
         if response.status_code == StatusCode.MOVED:  # MOBILE URL
-            matches = re.findall("com/@(.*?)/live", content)
+            matches = _RE_LIVE_USER.findall(content)
             if len(matches) < 1:
                 raise LiveNotFound(Error.LIVE_NOT_FOUND)
 
             self.user = matches[0]
 
         # https://www.tiktok.com/@<username>/live
-        match = re.match(
-            r"https?://(?:www\.)?tiktok\.com/@([^/]+)/live",
-            self.url
-        )
+        match = _RE_TIKTOK_LIVE_URL.match(self.url)
         if match:
             self.user = match.group(1)
 
         self.room_id = self.get_room_id_from_user()
 
+    def _fetch_user_live_page(self):
+        """
+        Fetch https://www.tiktok.com/@<user>/live once, returning
+        (status_code, text). Reuses the cached page for the current user
+        when one is available.
+        """
+        cached = self._live_page_cache
+        if cached is not None and cached[0] == self.user:
+            return cached[1], cached[2]
+
+        response = self.httpclient.get(
+            f"https://www.tiktok.com/@{self.user}/live",
+            allow_redirects=False
+        )
+        self._live_page_cache = (
+            self.user, response.status_code, response.text
+        )
+
+        return response.status_code, response.text
+
     def get_room_id_from_user(self):
         """
         Given a username, I get the room_id
         """
-        content = self.httpclient.get(
-            url=f'https://www.tiktok.com/@{self.user}/live'
-        ).text
+        _, content = self._fetch_user_live_page()
+        # One-shot cache: the automatic-mode poll must see a fresh page
+        # on its next pass.
+        self._live_page_cache = None
 
         if 'Please wait...' in content:
             raise IPBlockedByWAF
 
-        pattern = re.compile(
-            r'<script id="SIGI_STATE" type="application/json">(.*?)</script>',
-            re.DOTALL)
-        match = pattern.search(content)
+        # Bracket the JSON payload with a bounded slice instead of running
+        # the DOTALL regex over the whole page; fall back to the regex if
+        # the markup ever changes.
+        start = content.find(_SIGI_OPEN_TAG)
+        end = content.find(_SIGI_CLOSE_TAG, start) if start != -1 else -1
 
-        if not match:
-            raise ValueError("[-] Error extracting roomId")
+        if start != -1 and end != -1:
+            payload = content[start + len(_SIGI_OPEN_TAG):end]
+        else:
+            match = _RE_SIGI.search(content)
+            if not match:
+                raise ValueError("[-] Error extracting roomId")
+            payload = match.group(1)
 
-        data = json.loads(match.group(1))
+        data = orjson.loads(payload)
 
         if 'LiveRoom' not in data and 'CurrentRoom' in data:
             return ""
 
-        room_id = data.get('LiveRoom', {}).get('liveRoomUserInfo', {}).get(
-            'user', {}).get('roomId', None)
+        try:
+            room_id = data['LiveRoom']['liveRoomUserInfo']['user']['roomId']
+        except (KeyError, TypeError):
+            raise ValueError("RoomId not found.")
 
         if room_id is None:
             raise ValueError("RoomId not found.")
@@ -293,7 +438,7 @@ class TikTok:
         Given a room_id, I get the username
         """
         url = f"https://www.tiktok.com/api/live/detail/?aid=1988&roomID={self.room_id}"
-        data = self.httpclient.get(url).json()
+        data = orjson.loads(self.httpclient.get(url).content)
 
         unique_id = data.get('LiveRoomInfo', {}).get('ownerInfo', {}).get(
             'uniqueId', None)
@@ -307,9 +452,6 @@ class TikTok:
         """
         Checks if the user is in a blacklisted country that requires login
         """
-        response = self.httpclient.get(
-            f"https://www.tiktok.com/@{self.user}/live",
-            allow_redirects=False
-        )
+        status_code, _ = self._fetch_user_live_page()
 
-        return response.status_code == StatusCode.REDIRECT
+        return status_code == StatusCode.REDIRECT
@@ -1,4 +1,5 @@
 import requests as req
+from requests.adapters import HTTPAdapter
 
 from utils.enums import StatusCode
 from utils.logger_manager import LoggerManager
@@ -15,6 +16,17 @@ class HttpClient:
 
     def configure_session(self) -> None:
         self.req = req.Session()
+
+        # Keep-alive connection pool: amortize TCP+TLS handshakes across
+        # the polling loop instead of reconnecting on every request.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=8,
+            max_retries=0
+        )
+        self.req.mount("https://", adapter)
+        self.req.mount("http://", adapter)
+
         self.req.headers.update({
             "Sec-Ch-Ua": "\"Not/A)Brand\";v=\"8\", \"Chromium\";v=\"126\"",
             "Sec-Ch-Ua-Mobile": "?0", "Sec-Ch-Ua-Platform": "\"Linux\"",
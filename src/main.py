@@ -16,6 +16,8 @@ from utils.custom_exceptions import LiveNotFound, ArgsParseError, \
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+_RE_IS_TIKTOK_LIVE = re.compile(str(Regex.IS_TIKTOK_LIVE))
+
 
 def banner() -> None:
     """
@@ -147,7 +149,7 @@ def main():
         if args.mode and args.mode not in ["manual", "automatic"]:
             raise ArgsParseError("Incorrect mode value. Choose between 'manual' and 'automatic'.")
 
-        if args.url and not re.match(str(Regex.IS_TIKTOK_LIVE), args.url):
+        if args.url and not _RE_IS_TIKTOK_LIVE.match(args.url):
             raise LiveNotFound("The provided URL does not appear to be a valid TikTok live URL.")
 
         if args.user and args.room_id:
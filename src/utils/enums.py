@@ -19,7 +19,7 @@ class TimeOut(IntEnum):
 
     ONE_MINUTE = 60
     AUTOMATIC_MODE = 5
-    CONNECTION_CLOSED = 2
+    MIN_RETRY = 10
 
 
 class StatusCode(IntEnum):
@@ -53,7 +53,7 @@ class Error(Enum):
     USER_NOT_CURRENTLY_LIVE = "The user is not currently live."
 
     CONNECTION_CLOSED = "[-] Connection broken by the server."
-    CONNECTION_CLOSED_AUTOMATIC = f"{CONNECTION_CLOSED}. Try again after Delay of {TimeOut.CONNECTION_CLOSED} minutes"
+    CONNECTION_CLOSED_AUTOMATIC = f"{CONNECTION_CLOSED} Retrying..."
 
     URL_NOT_FOUND = "[-] Unable to find stream url."
     LIVE_NOT_FOUND = "The link provided is not a live tiktok"